@@ -0,0 +1,181 @@
+"""
+Bulk offline summarization of statement PDFs.
+
+Parses every PDF in a directory and summarizes it with the expense summarizer model,
+throttled by a per-model token bucket so the run stays within the API quota.
+Results are appended to <output_dir>/results.jsonl in batches; that file doubles as
+the checkpoint, so re-running the same command resumes where it stopped. Results are
+only reused when --income, --savings-goal and --debt match the earlier run.
+
+Usage:
+    python batch_summarize.py statements/ reports/ --income 50000 --savings-goal 10000
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.batch.scheduler import ModelScheduler
+from src.chatbot.summarize_user_expenses import (summarize_user_expenses,
+  summarize_user_expenses_structured, render_summary, summary_sections)
+from src.constants import EXPENSE_SUMMARIZER_MODEL, STRUCTURED_SUMMARY
+from src.statement_parser.registry import parse_statement, UnsupportedStatementError
+
+RESULTS_FILE = "results.jsonl"
+
+# Statuses that are final; anything else (e.g. "error") is retried on the next run
+DONE_STATUSES = {"ok", "unsupported"}
+
+
+class ResultWriter:
+    """
+    Buffers results and appends them to a JSONL file every `flush_every` records.
+    """
+
+    def __init__(self, path: str, flush_every: int):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
+
+
+def run_inputs(args: argparse.Namespace) -> dict:
+    """
+    The settings a summary depends on. Results are only reused when these match.
+    """
+    return {
+        "income": args.income,
+        "savings_goal": args.savings_goal,
+        "debt": args.debt,
+        "structured_summary": STRUCTURED_SUMMARY,
+    }
+
+
+def load_checkpoint(results_path: str, inputs: dict) -> set[str]:
+    """
+    Return the statement files that already have a final result for the same inputs.
+    """
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partially written last line of an interrupted run
+            if record.get("status") in DONE_STATUSES and record.get("inputs") == inputs:
+                done.add(record["file"])
+    return done
+
+
+def build_expense_payload(data: dict, income: float, savings_goal: float, debt: float) -> str:
+    """
+    Build the expense record sent to the summarizer, in the same format as the frontend.
+    """
+    expense_str = f"""
+    Timeframe: {data['timeframe']}
+    Monthly Income: {income}
+    Savings Goal: {savings_goal}
+    Debt/EMI: {debt}
+    Total Expense: ₹{data['total_expense']}
+
+    Categories & Amounts:
+    """
+    for cat, amt in data['categories'].items():
+        pct = data['percentages'].get(cat, 0)
+        expense_str += f"{cat}: ₹{amt} ({pct}%)\n"
+    return expense_str
+
+
+def process_statement(file_name: str, input_dir: str, args: argparse.Namespace,
+                      scheduler: ModelScheduler) -> dict:
+    """
+    Parse and summarize one statement. Never raises; failures are returned as records.
+    """
+    inputs = run_inputs(args)
+    try:
+        data = parse_statement(os.path.join(input_dir, file_name))
+        payload = build_expense_payload(data, args.income, args.savings_goal, args.debt)
+        # The scheduler owns retries and rate limiting, so the client must not retry on its own
+        if STRUCTURED_SUMMARY:
+            structured_summary = scheduler.call(EXPENSE_SUMMARIZER_MODEL, summarize_user_expenses_structured,
+                                                payload, max_retries=0)
+            return {"file": file_name, "inputs": inputs, "status": "ok", "parsed": data,
+                    "summary": render_summary(structured_summary), "sections": summary_sections(structured_summary)}
+        summary = scheduler.call(EXPENSE_SUMMARIZER_MODEL, summarize_user_expenses, payload, max_retries=0)
+        return {"file": file_name, "inputs": inputs, "status": "ok", "parsed": data, "summary": summary}
+    except UnsupportedStatementError as e:
+        return {"file": file_name, "inputs": inputs, "status": "unsupported", "error": str(e)}
+    except Exception as e:
+        return {"file": file_name, "inputs": inputs, "status": "error", "error": str(e)}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Summarize a directory of statement PDFs.")
+    arg_parser.add_argument("input_dir", help="Directory containing statement PDFs")
+    arg_parser.add_argument("output_dir", help="Directory for results.jsonl")
+    arg_parser.add_argument("--income", type=float, required=True, help="Monthly income used for every statement")
+    arg_parser.add_argument("--savings-goal", type=float, default=0)
+    arg_parser.add_argument("--debt", type=float, default=0)
+    arg_parser.add_argument("--workers", type=int, default=4, help="Statements processed in parallel")
+    arg_parser.add_argument("--max-retries", type=int, default=5)
+    arg_parser.add_argument("--flush-every", type=int, default=10, help="Results buffered before writing")
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results_path = os.path.join(args.output_dir, RESULTS_FILE)
+
+    done = load_checkpoint(results_path, run_inputs(args))
+    pending = sorted(
+        name for name in os.listdir(args.input_dir)
+        if name.lower().endswith(".pdf") and name not in done
+    )
+    print(f"{len(done)} statements already done, {len(pending)} to process.")
+
+    scheduler = ModelScheduler(max_retries=args.max_retries)
+    writer = ResultWriter(results_path, args.flush_every)
+    counts = {}
+
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = [
+            executor.submit(process_statement, name, args.input_dir, args, scheduler)
+            for name in pending
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            writer.add(record)
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            print(f"[{sum(counts.values())}/{len(pending)}] {record['file']}: {record['status']}")
+    except KeyboardInterrupt:
+        print("Interrupted. Re-run the same command to resume.")
+    finally:
+        # Drop statements not started yet; finished results are saved for the next run
+        executor.shutdown(wait=False, cancel_futures=True)
+        writer.flush()
+
+    print(f"Done: {counts}. Results in {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Measure backend cold start: the time a fresh interpreter needs to import each module.
+
+Run from the repo root:
+    python benchmarks/bench_import_time.py [--runs 5]
+
+Each import runs in a new subprocess so nothing is cached between runs.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "src.paytm_pdf_parser.parse_pdf",
+    "src.statement_parser.registry",
+    "src.chatbot.summarize_user_expenses",
+    "src.chatbot.answer_user_queries",
+    "fastapi_app",
+]
+
+def time_import(module: str) -> float:
+    """
+    Import a module in a fresh interpreter and return the import time in seconds.
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - start)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print(f"{'module':<40}{'median (ms)':>12}{'min (ms)':>12}")
+    for module in MODULES:
+        timings = [time_import(module) for _ in range(args.runs)]
+        print(f"{module:<40}{statistics.median(timings) * 1000:>12.1f}{min(timings) * 1000:>12.1f}")
+
+if __name__ == "__main__":
+    main()
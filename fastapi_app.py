@@ -1,17 +1,64 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks
 from pydantic import BaseModel
-from src.constants import UPLOAD_DIR
+from src.constants import MAX_UPLOAD_SIZE, UPLOAD_SPOOL_THRESHOLD
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.chatbot.summarize_user_expenses import (summarize_user_expenses, 
-  fetch_relevant_summary_chunks, store_summary_in_chroma)
-from src.paytm_pdf_parser.parse_pdf import parse_paytm_pdf
-from src.chatbot.answer_user_queries import answer_user_queries
-from src.constants import NUM_DOCS_TO_FETCH
+  fetch_relevant_summary_chunks, store_summary_in_chroma, warm_up as warm_up_summarizer,
+  summarize_user_expenses_structured, store_structured_summary_in_chroma, render_summary,
+  delete_session_chunks)
+from src.statement_parser.registry import (parse_statement, UnsupportedStatementError,
+  StatementParseError)
+from src.chatbot.answer_user_queries import (answer_user_queries, record_conversation_turn,
+  warm_up as warm_up_chat)
+from src.chatbot.answer_cache import get_cached_answer, cache_answer, invalidate_answer_cache
+from src.constants import (NUM_DOCS_TO_FETCH, WARM_UP_MODELS, STRUCTURED_SUMMARY, WEB_CONCURRENCY,
+  CHROMA_HOST, SESSION_TTL_SECONDS, SESSION_CLEANUP_INTERVAL_SECONDS)
+from src.state.state_store import touch_session, expire_sessions
+from src.middleware.upload_size_limit import UploadSizeLimitMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.formparsers import MultiPartParser
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
-import os
 
-app = FastAPI()
+# Uploads are kept in memory up to this size and spooled to an auto-deleted temp file above it
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_THRESHOLD
+
+def cleanup_expired_sessions() -> None:
+    """
+    Delete state and summary chunks of sessions idle for longer than SESSION_TTL_SECONDS.
+    """
+    for session_id in expire_sessions(SESSION_TTL_SECONDS):
+        delete_session_chunks(session_id)
+
+async def run_session_cleanup():
+    while True:
+        try:
+            await asyncio.to_thread(cleanup_expired_sessions)
+        except Exception as e:
+            print(f"Session cleanup failed: {e}")
+        await asyncio.sleep(SESSION_CLEANUP_INTERVAL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Chroma's embedded client keeps its index in process memory, so workers sharing
+    # the persistent directory would see (and corrupt) each other's data
+    if WEB_CONCURRENCY > 1 and not CHROMA_HOST:
+        raise RuntimeError(
+            "Running several workers requires a Chroma server. Set CHROMA_HOST or use WEB_CONCURRENCY=1."
+        )
+
+    # Models are created lazily on first use; optionally pay that cost at startup instead
+    if WARM_UP_MODELS:
+        warm_up_summarizer()
+        warm_up_chat()
+
+    cleanup_task = asyncio.create_task(run_session_cleanup())
+    yield
+    cleanup_task.cancel()
+
+app = FastAPI(lifespan=lifespan)
 
 # allow all origins for now (safe for testing)
 app.add_middleware(
@@ -22,13 +69,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads before (or while) the body is received and spooled
+app.add_middleware(UploadSizeLimitMiddleware, max_size=MAX_UPLOAD_SIZE, paths=("/parse-pdf",))
+
 # Define request body
 class ExpenseRequest(BaseModel):
     expenses: str
+    session_id: str
 
 class QueryRequest(BaseModel):
     query: str 
     expenses: str
+    session_id: str
 
 @app.get("/")
 async def root():
@@ -37,36 +89,64 @@ async def root():
 @app.post("/parse-pdf")
 async def parse_pdf(file: UploadFile = File(...)):
     try:
-        file_path = os.path.join(UPLOAD_DIR, file.filename)  #Create a file path
-
-        #Save the uploaded file
-        with open(file_path, 'wb') as f:
-            contents = await file.read()
-            f.write(contents)
-
-        result_json = parse_paytm_pdf(str(file_path))
+        #Parse straight from the upload stream, nothing is written to the source tree.
+        #The format is detected from the first page so unsupported files fail fast.
+        #Size is already capped by UploadSizeLimitMiddleware; parsing is CPU-bound, so keep it off the event loop.
+        result_json = await run_in_threadpool(parse_statement, file.file)
 
         return JSONResponse(content=result_json)
+    except UnsupportedStatementError as e:
+        return JSONResponse(status_code=415, content={'error': str(e)})
+    except StatementParseError as e:
+        return JSONResponse(status_code=422, content={'error': str(e)})
     except Exception as e:
-        return {'error': str(e)}
+        return JSONResponse(status_code=500, content={'error': str(e)})
+    finally:
+        await file.close()  #releases the in-memory buffer or deletes the spooled temp file
 
 @app.post("/summarize")
 async def summarize_expenses(req: ExpenseRequest):
     try:
-        summary = summarize_user_expenses(req.expenses)
-        store_summary_in_chroma(summary)
+        touch_session(req.session_id)
+        if STRUCTURED_SUMMARY:
+            #Sections come back as typed fields and go straight into chroma, no regex chunking
+            structured_summary = summarize_user_expenses_structured(req.expenses)
+            store_structured_summary_in_chroma(structured_summary, req.session_id)
+            summary = render_summary(structured_summary)
+        else:
+            summary = summarize_user_expenses(req.expenses)
+            store_summary_in_chroma(summary, req.session_id)
+        invalidate_answer_cache(req.session_id)  #answers were based on the previous data
         return {"summary": summary}
     except Exception as e:
         return {"error": str(e)}
 
 @app.post("/chat")
-async def chat_endpoint(request: QueryRequest):
+async def chat_endpoint(request: QueryRequest, background_tasks: BackgroundTasks):
     try:
         user_query = request.query
         actual_expenses = request.expenses
-        retrieved_context = fetch_relevant_summary_chunks(user_query, NUM_DOCS_TO_FETCH)
+        session_id = request.session_id
+        touch_session(session_id)
+
+        #The cache is best effort (similarity matching calls the embeddings API): any failure is a miss
+        try:
+            cached_response = get_cached_answer(session_id, user_query, actual_expenses)
+        except Exception as e:
+            print(f"Answer cache lookup failed: {e}")
+            cached_response = None
+        if cached_response is not None:
+            #Still part of the conversation; summarized after the response is sent
+            background_tasks.add_task(record_conversation_turn, session_id, user_query, cached_response)
+            return {'answer': cached_response}
+
+        retrieved_context = fetch_relevant_summary_chunks(user_query, NUM_DOCS_TO_FETCH, session_id)
         
-        response = answer_user_queries(user_query, actual_expenses, retrieved_context)
+        response = answer_user_queries(user_query, actual_expenses, retrieved_context, session_id)
+        try:
+            cache_answer(session_id, user_query, actual_expenses, response)
+        except Exception as e:
+            print(f"Answer cache write failed: {e}")
         return {'answer': response}
     except Exception as e:
         return {'error': str(e)}
@@ -0,0 +1,56 @@
+import pandas as pd
+
+# Resampling frequencies exposed to the frontend
+FREQUENCIES = {
+    "Day": "D",
+    "Week": "W-SUN",    # Monday-Sunday weeks
+    "Month": "MS",
+}
+
+def transactions_to_frame(transactions: list[dict]) -> pd.DataFrame:
+    """
+    Build a timestamp-indexed frame with "credit" and "debit" columns from the
+    "transactions" list returned by parse_paytm_pdf.
+    """
+    if not transactions:
+        return pd.DataFrame(columns=["credit", "debit"], index=pd.DatetimeIndex([], name="timestamp"))
+
+    df = pd.DataFrame.from_records(transactions, columns=["timestamp", "type", "amount"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    is_credit = df["type"].to_numpy() == "credit"
+    amount = df["amount"].to_numpy(dtype=float)
+
+    frame = pd.DataFrame({
+        "credit": amount * is_credit,
+        "debit": amount * ~is_credit,
+    }, index=pd.DatetimeIndex(df["timestamp"], name="timestamp"))
+    return frame.sort_index()
+
+def cashflow_series(frame: pd.DataFrame, freq: str = "D", window: int = 7,
+                    opening_balance: float = 0.0) -> pd.DataFrame:
+    """
+    Resample transactions into a regular cashflow series.
+
+    Args:
+        frame: Output of transactions_to_frame.
+        freq: Pandas offset alias, see FREQUENCIES (e.g. "D", "W-SUN", "MS").
+        window: Number of periods in the moving average of net cashflow.
+        opening_balance: Balance before the first transaction.
+
+    Returns:
+        pd.DataFrame indexed by period start with columns:
+            - credit, debit: totals per period (periods without transactions are 0)
+            - net: credit - debit
+            - balance: cumulative net at the end of each period, starting from
+              opening_balance. Statements carry no account balance, so with the
+              default of 0 this is cumulative net cashflow, not the account balance
+            - net_moving_avg: moving average of net over `window` periods
+    """
+    series = frame[["credit", "debit"]].resample(freq).sum()
+    if freq.startswith("W"):
+        # Weekly bins are labelled by their last day; relabel by the first, like "D" and "MS"
+        series.index = series.index.to_period(freq).start_time.rename(series.index.name)
+    series["net"] = series["credit"] - series["debit"]
+    series["balance"] = series["net"].cumsum() + opening_balance
+    series["net_moving_avg"] = series["net"].rolling(window, min_periods=1).mean()
+    return series
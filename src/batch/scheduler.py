@@ -0,0 +1,106 @@
+import random
+import re
+import threading
+import time
+from typing import Any, Callable
+from src.constants import MODEL_RATE_LIMITS, DEFAULT_MODEL_RATE_LIMIT
+
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Used when a client library wraps the original error and only its message survives.
+# Status codes must be whole words, so e.g. "request 5002" or "limit 50000" don't match.
+RETRYABLE_STATUS_PATTERN = re.compile(r"\b(408|429|500|502|503|504)\b")
+RETRYABLE_MESSAGE_MARKERS = (
+    "resource exhausted", "resource_exhausted", "quota", "rate limit",
+    "timeout", "timed out", "deadline exceeded", "unavailable",
+)
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for transient failures (rate limit, timeout, 5xx). Permanent ones such as
+    auth, invalid argument or output validation errors are not retried.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, ValueError):  # includes pydantic validation errors
+        return False
+    for attr in ("status_code", "code"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status in RETRYABLE_STATUS_CODES
+    message = str(error).lower()
+    return (RETRYABLE_STATUS_PATTERN.search(message) is not None
+            or any(marker in message for marker in RETRYABLE_MESSAGE_MARKERS))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Refills `rate` tokens per second up to `capacity`;
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ModelScheduler:
+    """
+    Throttles calls per model: a token bucket enforces the requests-per-minute quota
+    and a semaphore caps how many calls to the model are in flight at once.
+    Transient failures (see is_retryable) are retried with exponential backoff and jitter.
+    Wrapped clients should have their own retries disabled, otherwise their retries
+    bypass the token bucket.
+    """
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 2.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def _limits_for(self, model: str) -> tuple[TokenBucket, threading.Semaphore]:
+        with self._lock:
+            if model not in self._buckets:
+                limits = MODEL_RATE_LIMITS.get(model, DEFAULT_MODEL_RATE_LIMIT)
+                self._buckets[model] = TokenBucket(
+                    rate=limits["requests_per_minute"] / 60,
+                    capacity=limits["burst"]
+                )
+                self._semaphores[model] = threading.Semaphore(limits["max_concurrency"])
+            return self._buckets[model], self._semaphores[model]
+
+    def call(self, model: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) within the rate limits of `model`, retrying transient failures.
+        """
+        bucket, semaphore = self._limits_for(model)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                with semaphore:
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"{model} call failed ({e}). Retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{self.max_retries}).")
+                time.sleep(delay)
@@ -0,0 +1,128 @@
+from functools import lru_cache
+from src.constants import (ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_MAX_EMBEDDINGS,
+  ANSWER_CACHE_SIMILARITY_THRESHOLD)
+from src.state.state_store import get_state_store, ANSWER_CACHE, SUMMARIES
+import hashlib
+import math
+import re
+import time
+
+# Per-session cache of chatbot answers. An entry is only valid for the expense payload
+# and summary it was answered against, so both hashes are stored with the session's cache
+# and a change in either throws the cache away. Queries match exactly after normalization,
+# or, when ANSWER_CACHE_SIMILARITY_THRESHOLD is set, by cosine similarity of their embeddings.
+# Queries that lean on the conversation ("why?", "explain that more") are never cached,
+# since the right answer depends on what was said before.
+
+# Words that make a query refer back to earlier turns
+FOLLOW_UP_WORDS = {
+    "it", "its", "that", "this", "those", "these", "them", "they", "above", "previous",
+    "earlier", "again", "more", "elaborate", "why", "else", "also", "same",
+}
+MIN_CACHEABLE_WORDS = 3
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace so trivially different
+    phrasings ("Where did I spend most?" / "where did i spend most") share a key.
+    """
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+def is_context_dependent(user_query: str) -> bool:
+    """
+    True if the query is too short to stand on its own or refers back to the conversation.
+    """
+    words = normalize_query(user_query).split()
+    return len(words) < MIN_CACHEABLE_WORDS or any(word in FOLLOW_UP_WORDS for word in words)
+
+@lru_cache(maxsize=256)
+def _embed_query(normalized_query: str) -> tuple[float, ...]:
+    # Imported here to avoid a cycle and keep the embeddings client lazy
+    from src.chatbot.summarize_user_expenses import get_embeddings
+
+    return tuple(get_embeddings().embed_query(normalized_query))
+
+def _cosine_similarity(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def _load_session_cache(session_id: str, expenses: str) -> dict:
+    """
+    Return the session's cache, or an empty one if it was built against
+    a different expense payload or summary.
+    """
+    payload_hash = _hash(expenses)
+    summary_hash = _hash(get_state_store().get(SUMMARIES, session_id, ""))
+    cache = get_state_store().get(ANSWER_CACHE, session_id)
+    if not cache or cache["payload_hash"] != payload_hash or cache["summary_hash"] != summary_hash:
+        cache = {"payload_hash": payload_hash, "summary_hash": summary_hash, "entries": []}
+    return cache
+
+def get_cached_answer(session_id: str, user_query: str, expenses: str) -> str | None:
+    """
+    Return a cached answer for the query in this session, or None on a miss.
+    """
+    if is_context_dependent(user_query):
+        return None
+
+    entries = _load_session_cache(session_id, expenses)["entries"]
+    if not entries:
+        return None
+
+    normalized = normalize_query(user_query)
+    for entry in entries:
+        if entry["query"] == normalized:
+            return entry["answer"]
+
+    candidates = [entry for entry in entries if entry["embedding"]]
+    if ANSWER_CACHE_SIMILARITY_THRESHOLD and candidates:
+        embedding = _embed_query(normalized)
+        best = max(candidates, key=lambda entry: _cosine_similarity(embedding, entry["embedding"]))
+        if _cosine_similarity(embedding, best["embedding"]) >= ANSWER_CACHE_SIMILARITY_THRESHOLD:
+            return best["answer"]
+
+    return None
+
+def cache_answer(session_id: str, user_query: str, expenses: str, answer: str) -> None:
+    """
+    Store an answer for the query, keeping at most ANSWER_CACHE_MAX_ENTRIES per session.
+    Only the newest ANSWER_CACHE_MAX_EMBEDDINGS entries keep their embedding, so the
+    stored value stays small; older entries still match exactly.
+    """
+    if is_context_dependent(user_query):
+        return
+
+    normalized = normalize_query(user_query)
+    embedding = list(_embed_query(normalized)) if ANSWER_CACHE_SIMILARITY_THRESHOLD else None
+    fresh_cache = _load_session_cache(session_id, expenses)
+
+    def _add_entry(cache):
+        # Re-check staleness under the lock; another worker may have updated the cache meanwhile
+        if (not cache or cache["payload_hash"] != fresh_cache["payload_hash"]
+                or cache["summary_hash"] != fresh_cache["summary_hash"]):
+            cache = fresh_cache
+        entries = [entry for entry in cache["entries"] if entry["query"] != normalized]
+        entries.append({
+            "query": normalized,
+            "answer": answer,
+            "embedding": embedding,
+            "created_at": time.time()
+        })
+        entries = entries[-ANSWER_CACHE_MAX_ENTRIES:]
+        for entry in entries[:-ANSWER_CACHE_MAX_EMBEDDINGS]:
+            entry["embedding"] = None
+        cache["entries"] = entries
+        return cache
+
+    get_state_store().update(ANSWER_CACHE, session_id, _add_entry)
+
+def invalidate_answer_cache(session_id: str) -> None:
+    """
+    Drop all cached answers of a session (e.g. after new expenses are summarized).
+    """
+    get_state_store().delete(ANSWER_CACHE, session_id)
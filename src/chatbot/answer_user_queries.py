@@ -1,39 +1,55 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
-from langchain.memory import ConversationSummaryMemory
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from functools import lru_cache
 from src.constants import CHAT_MODEL, CONVERSATION_SUMMARIZER_MODEL
+from src.state.state_store import get_state_store, CHAT_MEMORY
 from dotenv import load_dotenv
 import os 
 
 load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
 
-#Initialize llama-3.3-70b-versatile
-groq_llm = ChatGroq(
+# Models, memory and the chain are created lazily on first use and then reused by the
+# whole process, so importing this module is cheap and requests don't rebuild clients.
+
+@lru_cache(maxsize=None)
+def get_groq_llm():
+    """
+    Initialize llama-3.3-70b-versatile (conversation summarizer).
+    """
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
         model=CONVERSATION_SUMMARIZER_MODEL,  
         temperature=0,
-        api_key=api_key,
+        api_key=os.getenv("GROQ_API_KEY"),
         timeout=60,
         max_retries=2
     )
 
-# Initialize Gemini 2.5 Pro
-gemini_llm = ChatGoogleGenerativeAI(
-    model=CHAT_MODEL,
-    temperature=0,          
-    max_output_tokens=65535    
-)
+@lru_cache(maxsize=None)
+def get_gemini_llm():
+    """
+    Initialize Gemini 2.5 Pro (chat model).
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
-# Conversation summary memory
-memory = ConversationSummaryMemory(
-    llm=groq_llm,
-    memory_key="chat_history",
-    return_messages=True
-)
+    return ChatGoogleGenerativeAI(
+        model=CHAT_MODEL,
+        temperature=0,          
+        max_output_tokens=65535    
+    )
 
-parser = StrOutputParser()
+@lru_cache(maxsize=None)
+def get_memory():
+    """
+    Conversation summary memory. Only used to summarize turns; the running summary itself
+    is kept per session in the shared state store so every worker sees the same history.
+    """
+    from langchain.memory import ConversationSummaryMemory
+
+    return ConversationSummaryMemory(
+        llm=get_groq_llm(),
+        memory_key="chat_history",
+        return_messages=True
+    )
 
 template="""
 You are a highly intelligent and financially savvy assistant that helps users analyze their personal expenses.
@@ -57,32 +73,65 @@ Using the above information, give a **clear, accurate, and contextual answer** t
 - Be concise but insightful. If calculations are needed, show them clearly.
 """
 
-prompt = PromptTemplate(
-    template=template,
-    input_variables=['user_query', 'actual_expenses', 'retrieved_context', 'conversation_summary']
-)
+@lru_cache(maxsize=None)
+def get_chat_chain():
+    """
+    Build the prompt | gemini | parser chain once.
+    """
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
 
-def answer_user_queries(user_query: str, actual_expenses: str, retrieved_context: str) -> str:
+    prompt = PromptTemplate(
+        template=template,
+        input_variables=['user_query', 'actual_expenses', 'retrieved_context', 'conversation_summary']
+    )
+    return prompt | get_gemini_llm() | StrOutputParser()
+
+def warm_up() -> None:
+    """
+    Create the models and chain ahead of the first request.
+    """
+    get_memory()
+    get_chat_chain()
+
+def answer_user_queries(user_query: str, actual_expenses: str, retrieved_context: str, session_id: str) -> str:
     """
     Takes in a user query and answers it accurately using:
     - Actual expense data (passed in)
     - Top relevant chunks from expense summary (passed in)
-    - Summarized conversation history
+    - Summarized conversation history of the session
     - Gemini LLM for final response
     """
-    #Load the conversation summary
-    conversation_summary = memory.load_memory_variables({}).get("chat_history", "")
-
-    chain = prompt | gemini_llm | parser
+    #Load the conversation summary of this session
+    store = get_state_store()
+    conversation_summary = store.get(CHAT_MEMORY, session_id, "")
 
-    response = chain.invoke({
+    response = get_chat_chain().invoke({
         'actual_expenses': actual_expenses,
         'retrieved_context': retrieved_context,
         'conversation_summary': conversation_summary,
         'user_query': user_query
     })
     
-    # Save conversation turn
-    memory.save_context({"query": user_query}, {"response": response})
+    record_conversation_turn(session_id, user_query, response, conversation_summary)
 
-    return response 
\ No newline at end of file
+    return response
+
+def record_conversation_turn(session_id: str, user_query: str, response: str,
+                             conversation_summary: str | None = None) -> None:
+    """
+    Fold a query/response turn into the session's conversation summary.
+    """
+    from langchain_core.messages import HumanMessage, AIMessage
+
+    store = get_state_store()
+    if conversation_summary is None:
+        conversation_summary = store.get(CHAT_MEMORY, session_id, "")
+
+    # The summary is rebuilt with an LLM call, so it can't be done
+    # under a store lock: concurrent chats of one session are last-write-wins.
+    new_summary = get_memory().predict_new_summary(
+        [HumanMessage(content=user_query), AIMessage(content=response)],
+        conversation_summary
+    )
+    store.set(CHAT_MEMORY, session_id, new_summary)
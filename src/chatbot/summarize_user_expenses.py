@@ -1,39 +1,48 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.documents import Document
-from langchain_chroma import Chroma
-from src.constants import EMBEDDING_MODEL, EXPENSE_SUMMARIZER_MODEL
+from functools import lru_cache
+from pydantic import BaseModel, Field
+from src.constants import (EMBEDDING_MODEL, EXPENSE_SUMMARIZER_MODEL, CHROMA_COLLECTION_NAME,
+  CHROMA_PERSIST_DIR, CHROMA_HOST, CHROMA_PORT, STRUCTURED_SUMMARY_MAX_OUTPUT_TOKENS,
+  STRUCTURED_SUMMARY_THINKING_BUDGET, LLM_MAX_RETRIES)
+from src.state.state_store import get_state_store, SUMMARIES
 from dotenv import load_dotenv
-import os 
 import re 
 import uuid
 
 load_dotenv()
 
-#Initialize embedding model
-embeddings = GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
+# Clients, the vector store and the summarizer chain are created lazily on first use and
+# then reused by the whole process, so importing this module is cheap.
 
-#Initialize vector store
-vector_store = Chroma(
-    collection_name="expense_summary_collection",
-    embedding_function=embeddings,
-)
+@lru_cache(maxsize=None)
+def get_embeddings():
+    """
+    Initialize the embedding model.
+    """
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    return GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL)
 
-def summarize_user_expenses(user_expenses: str) -> str:
+@lru_cache(maxsize=None)
+def get_vector_store():
     """
-    Takes user expenses as an input and summarizes it
-    using llm.
+    Initialize the vector store. It is shared by every worker, so it must live outside the process:
+    a chroma server when CHROMA_HOST is set, otherwise a persistent directory on disk.
     """
-    # Initialize Gemini 2.5 Pro
-    llm = ChatGoogleGenerativeAI(
-        model=EXPENSE_SUMMARIZER_MODEL,
-        temperature=0,          
-        max_output_tokens=65535    
+    import chromadb
+    from langchain_chroma import Chroma
+
+    if CHROMA_HOST:
+        chroma_client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    else:
+        chroma_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+
+    return Chroma(
+        client=chroma_client,
+        collection_name=CHROMA_COLLECTION_NAME,
+        embedding_function=get_embeddings(),
     )
 
-    template="""
+template="""
     You are a financial advisor. Here is a user’s financial record:
 
     {user_expenses}
@@ -49,22 +58,166 @@ def summarize_user_expenses(user_expenses: str) -> str:
     6. 2–3 personalized recommendations to improve finances
     """
 
-    parser = StrOutputParser()
+@lru_cache(maxsize=None)
+def get_summarizer_chain(max_retries: int = LLM_MAX_RETRIES):
+    """
+    Build the prompt | Gemini 2.5 Pro | parser chain once (per max_retries).
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    llm = ChatGoogleGenerativeAI(
+        model=EXPENSE_SUMMARIZER_MODEL,
+        temperature=0,          
+        max_output_tokens=65535,
+        max_retries=max_retries
+    )
 
     prompt = PromptTemplate(
         template=template,
         input_variables=["user_expenses"]
     )
 
-    chain = prompt | llm | parser 
+    return prompt | llm | StrOutputParser()
+
+# Maximum words per section. The model is asked to stay within them and
+# summary_sections truncates anything longer.
+SUMMARY_SECTION_WORD_LIMITS = {
+    "spending_summary": 80,
+    "biggest_categories": 80,
+    "essentials_split": 80,
+    "savings_goal": 60,
+    "red_flags": 100,
+    "recommendations": 120,
+}
+
+class ExpenseSummary(BaseModel):
+    """
+    The 6-point expense summary as separate fields, so sections don't have to be
+    recovered from free-form text. Word caps keep the generation short.
+    """
+    spending_summary: str = Field(description=f"Concise summary of spending habits, at most {SUMMARY_SECTION_WORD_LIMITS['spending_summary']} words.")
+    biggest_categories: str = Field(description=f"Biggest 2-3 expense categories with amount and % of monthly income, at most {SUMMARY_SECTION_WORD_LIMITS['biggest_categories']} words.")
+    essentials_split: str = Field(description=f"Spending split between essentials and non-essentials with amounts and %, at most {SUMMARY_SECTION_WORD_LIMITS['essentials_split']} words.")
+    savings_goal: str = Field(description=f"How the user did against their savings goal, at most {SUMMARY_SECTION_WORD_LIMITS['savings_goal']} words.")
+    red_flags: str = Field(description=f"Red flags such as overspending areas, debt risk or imbalance, at most {SUMMARY_SECTION_WORD_LIMITS['red_flags']} words.")
+    recommendations: str = Field(description=f"2-3 personalized recommendations to improve finances, at most {SUMMARY_SECTION_WORD_LIMITS['recommendations']} words.")
+
+class SummaryGenerationError(RuntimeError):
+    """
+    Raised when the model returns no structured summary.
+    """
+
+# Section titles, in order, for each ExpenseSummary field
+SUMMARY_SECTION_TITLES = {
+    "spending_summary": "1. Concise Summary of Spending Habits",
+    "biggest_categories": "2. Biggest Expense Categories",
+    "essentials_split": "3. Spending Split: Essentials vs Non-Essentials",
+    "savings_goal": "4. Savings Goal Progress",
+    "red_flags": "5. Red Flags",
+    "recommendations": "6. Personalized Recommendations",
+}
+
+structured_template="""
+    You are a financial advisor. Here is a user’s financial record:
+
+    {user_expenses}
+    
+    Note: The expenses listed above are **for the entire timeframe** specified, which may span multiple months. Use the provided monthly income to compute percentages and evaluate spending patterns **on a per-month basis**.
+
+    Analyze this and fill in every field of the summary. Be specific and use the numbers
+    from the record, but stay within each field's word limit.
+    """
+
+@lru_cache(maxsize=None)
+def get_structured_summarizer_chain(max_retries: int = LLM_MAX_RETRIES):
+    """
+    Build the prompt | Gemini 2.5 Pro (structured output) chain once (per max_retries).
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain_core.prompts import PromptTemplate
+
+    llm = ChatGoogleGenerativeAI(
+        model=EXPENSE_SUMMARIZER_MODEL,
+        temperature=0,          
+        max_output_tokens=STRUCTURED_SUMMARY_MAX_OUTPUT_TOKENS,
+        thinking_budget=STRUCTURED_SUMMARY_THINKING_BUDGET,
+        max_retries=max_retries
+    )
+
+    prompt = PromptTemplate(
+        template=structured_template,
+        input_variables=["user_expenses"]
+    )
+
+    return prompt | llm.with_structured_output(ExpenseSummary)
+
+def warm_up() -> None:
+    """
+    Create the clients, vector store and chains ahead of the first request.
+    """
+    get_vector_store()
+    # Called exactly like summarize_user_expenses* does, so lru_cache hands requests these instances
+    get_summarizer_chain(LLM_MAX_RETRIES)
+    get_structured_summarizer_chain(LLM_MAX_RETRIES)
 
-    result = chain.invoke({
+def summarize_user_expenses(user_expenses: str, max_retries: int = LLM_MAX_RETRIES) -> str:
+    """
+    Takes user expenses as an input and summarizes it
+    using llm. Pass max_retries=0 when an outer scheduler handles retries.
+    """
+    result = get_summarizer_chain(max_retries).invoke({
         'user_expenses': user_expenses
     })
 
     return result
 
-import re
+def summarize_user_expenses_structured(user_expenses: str, max_retries: int = LLM_MAX_RETRIES) -> ExpenseSummary:
+    """
+    Takes user expenses as an input and summarizes them into
+    the 6 sections of ExpenseSummary using llm. Pass max_retries=0
+    when an outer scheduler handles retries.
+    """
+    summary = get_structured_summarizer_chain(max_retries).invoke({
+        'user_expenses': user_expenses
+    })
+
+    # with_structured_output returns None when the output was cut off before the fields
+    if summary is None:
+        raise SummaryGenerationError(
+            "The model returned no structured summary; its output was likely cut off by "
+            "STRUCTURED_SUMMARY_MAX_OUTPUT_TOKENS."
+        )
+    return summary
+
+def _truncate_words(text: str, max_words: int) -> str:
+    """
+    Cut text after max_words words, keeping its original line breaks.
+    """
+    words = list(re.finditer(r"\S+", text))
+    if len(words) <= max_words:
+        return text
+    return text[:words[max_words - 1].end()] + " …"
+
+def summary_sections(summary: ExpenseSummary) -> list[dict]:
+    """
+    Turn a structured summary into the same [{'title': ..., 'text': ...}] chunks
+    chunk_summary produces, without any text parsing. Sections over their
+    word limit are truncated.
+    """
+    return [
+        {"title": title, "text": _truncate_words(getattr(summary, field), SUMMARY_SECTION_WORD_LIMITS[field])}
+        for field, title in SUMMARY_SECTION_TITLES.items()
+    ]
+
+def render_summary(summary: ExpenseSummary) -> str:
+    """
+    Render a structured summary as markdown for display.
+    """
+    return "\n\n".join(
+        f"**{chunk['title']}**\n\n{chunk['text']}" for chunk in summary_sections(summary)
+    )
 
 def chunk_summary(summary_text: str) -> list[dict]:
     """
@@ -92,17 +245,31 @@ def chunk_summary(summary_text: str) -> list[dict]:
     return chunks
 
 
-def store_summary_in_chroma(summary_text: str) -> None:
+def store_summary_in_chroma(summary_text: str, session_id: str) -> None:
     """
-    Store the 6-point expense summary into Chroma for retrieval.
+    Store the free-form 6-point expense summary of a session into Chroma for retrieval.
+    Replaces any chunks previously stored for the same session.
     """
-    try:
-        # Split summary
-        chunks = chunk_summary(summary_text)
+    store_summary_chunks_in_chroma(chunk_summary(summary_text), summary_text, session_id)
+
+
+def store_structured_summary_in_chroma(summary: ExpenseSummary, session_id: str) -> None:
+    """
+    Store a structured expense summary of a session into Chroma, one chunk per section.
+    Replaces any chunks previously stored for the same session.
+    """
+    store_summary_chunks_in_chroma(summary_sections(summary), render_summary(summary), session_id)
 
-        existing_ids = vector_store.get()["ids"]
-        if existing_ids:  
-            vector_store.delete(ids=existing_ids)
+
+def store_summary_chunks_in_chroma(chunks: list[dict], summary_text: str, session_id: str) -> None:
+    """
+    Save the summary text of a session and replace its chunks in Chroma.
+    """
+    from langchain_core.documents import Document
+
+    try:
+        get_state_store().set(SUMMARIES, session_id, summary_text)
+        delete_session_chunks(session_id)
         
         # Prepare documents
         docs = []
@@ -110,21 +277,31 @@ def store_summary_in_chroma(summary_text: str) -> None:
             docs.append(Document(
                 id=str(uuid.uuid4()),          # unique ID for each chunk
                 page_content=chunk['title'] + chunk["text"],   
-                metadata={"title": chunk["title"]}
+                metadata={"title": chunk["title"], "session_id": session_id}
             ))
         
         # Add to vector store
-        vector_store.add_documents(docs)
+        get_vector_store().add_documents(docs)
         print("Chunks added in chroma.")
     except Exception as e:
         print(e)
 
+
+def delete_session_chunks(session_id: str) -> None:
+    """
+    Remove every summary chunk stored for a session.
+    """
+    vector_store = get_vector_store()
+    existing_ids = vector_store.get(where={"session_id": session_id})["ids"]
+    if existing_ids:
+        vector_store.delete(ids=existing_ids)
+
     
-def fetch_relevant_summary_chunks(user_query: str, k: int) -> str:
+def fetch_relevant_summary_chunks(user_query: str, k: int, session_id: str) -> str:
     """
-    Retrieve the most relevant expense summary chunks for a given query.
+    Retrieve the most relevant expense summary chunks of a session for a given query.
     """
-    results = vector_store.similarity_search(query=user_query, k=k)
+    results = get_vector_store().similarity_search(query=user_query, k=k, filter={"session_id": session_id})
     context = " ".join([doc.page_content for doc in results])
     return context
 
@@ -173,5 +350,5 @@ Scrutinize Your Food Budget: Since food is your largest expense, focus your effo
 Build a "Bare-Bones" Budget: Create a minimum-survival budget that includes only absolute essentials (rent, basic groceries, utilities). Your current spending is already close to this, but formalizing it will give you a clear target to cover as soon as you start earning. Once income is stable, your first goal should be to build an emergency fund covering 3-6 months of these essential expenses.
 Your spending habits show discipline in avoiding non-essentials. The fundamental issue is on the income side. By focusing on generating income and optimizing your largest expense category, you can quickly move towards a more stable financial future.
     """
-    store_summary_in_chroma(summary)
-    print(fetch_relevant_summary_chunks("Can you elaborate the Bare-Bones budget you are talking about", 2))
\ No newline at end of file
+    store_summary_in_chroma(summary, "local-test")
+    print(fetch_relevant_summary_chunks("Can you elaborate the Bare-Bones budget you are talking about", 2, "local-test"))
\ No newline at end of file
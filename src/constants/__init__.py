@@ -1,6 +1,41 @@
-UPLOAD_DIR = "src/paytm_pdf_parser"
+import os
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024    #largest accepted statement PDF (bytes)
+UPLOAD_SPOOL_THRESHOLD = 2 * 1024 * 1024    #uploads above this are spooled to a temp file instead of memory
 NUM_DOCS_TO_FETCH = 2    #for expense summary chunks
 EMBEDDING_MODEL = "models/gemini-embedding-001"
 CONVERSATION_SUMMARIZER_MODEL="llama-3.3-70b-versatile"
 EXPENSE_SUMMARIZER_MODEL="gemini-2.5-pro"
-CHAT_MODEL="gemini-2.5-pro"
\ No newline at end of file
+CHAT_MODEL="gemini-2.5-pro"
+LLM_MAX_RETRIES = 6    #client-side retries of the Gemini clients (library default)
+
+#Shared state (sessions, summaries, conversation memory, vectors)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")    #"sqlite" (multi-worker safe) or "memory" (single worker)
+STATE_DIR = os.getenv("STATE_DIR", ".state")
+STATE_DB_PATH = os.path.join(STATE_DIR, "state.db")
+CHROMA_PERSIST_DIR = os.path.join(STATE_DIR, "chroma")
+CHROMA_HOST = os.getenv("CHROMA_HOST", "")    #chroma server, required when running more than one worker
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8001"))
+CHROMA_COLLECTION_NAME = "expense_summary_collection"
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))    #uvicorn workers
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))    #state of idle sessions is deleted after this
+SESSION_CLEANUP_INTERVAL_SECONDS = 3600
+
+#Expense summary: structured (6 typed sections) or free-form text split by regex
+STRUCTURED_SUMMARY = os.getenv("STRUCTURED_SUMMARY", "true").lower() == "true"
+STRUCTURED_SUMMARY_MAX_OUTPUT_TOKENS = 8192    #includes the model's thinking tokens
+STRUCTURED_SUMMARY_THINKING_BUDGET = 2048    #kept well below the cap so the answer itself always fits
+
+#Per-session /chat answer cache
+ANSWER_CACHE_MAX_ENTRIES = 50
+ANSWER_CACHE_MAX_EMBEDDINGS = 10    #newest entries that keep their query embedding for similarity matching
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0"))    #e.g. 0.95; 0 = exact (normalized) matches only
+
+#Create LLM clients, vector store and chains at startup instead of on the first request
+WARM_UP_MODELS = os.getenv("WARM_UP_MODELS", "false").lower() == "true"
+
+#Batch summarization (batch_summarize.py): quota per model
+MODEL_RATE_LIMITS = {
+    EXPENSE_SUMMARIZER_MODEL: {"requests_per_minute": 5, "burst": 2, "max_concurrency": 2},
+}
+DEFAULT_MODEL_RATE_LIMIT = {"requests_per_minute": 10, "burst": 2, "max_concurrency": 2}
@@ -0,0 +1,77 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class _UploadTooLarge(Exception):
+    """
+    Raised from receive() to stop the app reading an oversized body.
+    """
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps the request body size of the given paths.
+
+    A Content-Length above the limit is rejected with 413 before any of the body is read,
+    and a malformed one with 400. Bodies without a Content-Length (chunked uploads) are
+    counted as they stream in and aborted with 413 as soon as they pass the limit, so
+    an oversized upload is never spooled in full.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, paths: tuple[str, ...]):
+        self.app = app
+        self.max_size = max_size
+        self.paths = paths
+
+    def _error(self, status_code: int, message: str) -> JSONResponse:
+        return JSONResponse(status_code=status_code, content={'error': message})
+
+    def _too_large(self) -> JSONResponse:
+        return self._error(413, f"File too large. Maximum size is {self.max_size // (1024 * 1024)} MB.")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None:
+            try:
+                declared_size = int(content_length)
+            except ValueError:
+                await self._error(400, "Invalid Content-Length header.")(scope, receive, send)
+                return
+            if declared_size > self.max_size:
+                await self._too_large()(scope, receive, send)
+                return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    exceeded = True
+                    raise _UploadTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            # Once the limit is hit, whatever error the app produced is replaced by our 413
+            if exceeded:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # The app may let our exception escape as-is or wrapped in its own
+            if not exceeded:
+                raise
+
+        if exceeded and not response_started:
+            await self._too_large()(scope, receive, send)
@@ -1,8 +1,66 @@
 import re
-import pandas as pd
-from langchain_community.document_loaders import PyPDFLoader
+from datetime import datetime
+from typing import BinaryIO, Union
+from pypdf import PdfReader
 
-def parse_paytm_pdf(pdf_path: str) -> dict:
+def extract_pdf_pages(pdf_source: Union[str, BinaryIO]) -> list[str]:
+    """
+    Extract the text of every page of a PDF.
+
+    Args:
+        pdf_source: Path to the PDF, or a binary file-like object (e.g. the
+            upload stream or an in-memory buffer). Streams are read in place,
+            nothing is written to disk.
+
+    Returns:
+        list[str]: Text of each page, in order.
+    """
+    if hasattr(pdf_source, "seek"):
+        pdf_source.seek(0)
+    reader = PdfReader(pdf_source)
+    return [page.extract_text() for page in reader.pages]
+
+# Text that appears on the first page of every Paytm UPI statement
+PAYTM_STATEMENT_MARKERS = ("UPI Statement for", "Total Money Paid")
+
+def is_paytm_statement(first_page_text: str) -> bool:
+    """
+    Cheap check on the first page text to tell whether a PDF is a Paytm UPI statement.
+    """
+    return all(marker in first_page_text for marker in PAYTM_STATEMENT_MARKERS)
+
+def parse_timeframe(timeframe: str) -> tuple[datetime, datetime] | None:
+    """
+    Parse a statement period like "1 MAY'25 - 31 MAY'25" into (start, end) datetimes.
+    Returns None if the timeframe is not in that format.
+    """
+    matches = re.findall(r"(\d{1,2})\s+([A-Za-z]{3})'(\d{2})", timeframe)
+    if len(matches) != 2:
+        return None
+    return tuple(
+        datetime.strptime(f"{day} {month.title()} {year}", "%d %b %y")
+        for day, month, year in matches
+    )
+
+def parse_transaction_timestamp(date_time: str, period: tuple[datetime, datetime] | None) -> datetime | None:
+    """
+    Turn a transaction stamp like "12 May 10:30 AM" into a full datetime. The statement
+    only prints day and month, so the year is the one that places the date inside the
+    statement period (statements can span a year boundary, e.g. DEC'24 - JAN'25).
+    """
+    years = [period[1].year, period[0].year] if period else [datetime.now().year]
+    timestamp = None
+    for year in years:
+        try:
+            candidate = datetime.strptime(f"{date_time} {year}", "%d %b %I:%M %p %Y")
+        except ValueError:
+            continue
+        if period is None or period[0].date() <= candidate.date() <= period[1].date():
+            return candidate
+        timestamp = timestamp or candidate
+    return timestamp
+
+def parse_paytm_pdf(pdf_source: Union[str, BinaryIO]) -> dict:
     """
     Parse a Paytm UPI statement PDF and extract transaction and user information.
     
@@ -11,7 +69,8 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
     spending data.
     
     Args:
-        pdf_path (str): Path to the Paytm UPI statement PDF file.
+        pdf_source (str | BinaryIO): Path to the Paytm UPI statement PDF file,
+            or a binary file-like object containing it.
     
     Returns:
         dict: A dictionary containing:
@@ -25,14 +84,18 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
             - categories (dict): Spending breakdown by category with amounts
             - percentages (dict): Percentage distribution of spending by category
             - transaction_count (int): Total number of transactions parsed
+            - transactions (list[dict]): Every debit and credit with "timestamp"
+              (ISO 8601), "type" ("debit" / "credit"), "amount", "merchant" and
+              "category", in statement order
     """
     
-    loader = PyPDFLoader(pdf_path)
-    docs = loader.load()
-    full_text = "\n".join([doc.page_content for doc in docs])
+    import pandas as pd  #deferred so importing the parser (and backend startup) stays cheap
+
+    pages = extract_pdf_pages(pdf_source)
+    full_text = "\n".join(pages)
 
     # ----- Extract user info from the first page -----
-    first_page_text = docs[0].page_content
+    first_page_text = pages[0]
 
     # Extract name - it's between "Contact Us" and the phone number line
     name_pattern = re.compile(r"Contact Us\s*\n\s*([A-Z][A-Z\s]+?)\s*\n\s*(\d{10})", re.MULTILINE)
@@ -70,6 +133,8 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
     transaction_blocks = re.split(r'(\d{1,2}\s+\w{3}\s+\d{1,2}:\d{2}\s+[AP]M)', full_text)
     
     transactions = []
+    cashflow = []  # debits and credits with full timestamps
+    period = parse_timeframe(timeframe)
     
     for i in range(1, len(transaction_blocks), 2):
         if i + 1 < len(transaction_blocks):
@@ -79,21 +144,32 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
             # Extract date only
             date_match = re.match(r'(\d{1,2}\s+\w{3})', date_time)
             date = date_match.group(1) if date_match else ""
+            timestamp = parse_transaction_timestamp(" ".join(date_time.split()), period)
             
-            # Extract merchant
-            merchant_match = re.search(r'((?:Paid to|Money sent to)\s+[^\n]+)', content)
+            # Extract merchant (or sender, for credits)
+            merchant_match = re.search(r'((?:Paid to|Money sent to|Received from)\s+[^\n]+)', content)
             merchant = merchant_match.group(1).strip() if merchant_match else ""
             
-            # Extract amount
-            amount_match = re.search(r'-\s*Rs\.?([\d,]+(?:\.\d{1,2})?)', content)
-            amount = float(amount_match.group(1).replace(",", "")) if amount_match else None
+            # Extract amount, "- Rs" for debits and "+ Rs" for credits
+            amount_match = re.search(r'([-+])\s*Rs\.?([\d,]+(?:\.\d{1,2})?)', content)
+            amount = float(amount_match.group(2).replace(",", "")) if amount_match else None
+            is_credit = amount_match is not None and amount_match.group(1) == "+"
             
             # Extract category/tag
             tag_match = re.search(r'Tag:\s*#\s*([^\n]+)', content)
             category = tag_match.group(1).strip() if tag_match else ""
+
+            if timestamp and amount:
+                cashflow.append({
+                    "timestamp": timestamp.isoformat(),
+                    "type": "credit" if is_credit else "debit",
+                    "amount": amount,
+                    "merchant": merchant,
+                    "category": category
+                })
             
-            # Only add if we have essential info
-            if date and merchant and amount and category:
+            # Only add debits with essential info to the expense breakdown
+            if date and merchant and amount and category and not is_credit:
                 transactions.append({
                     "Date": date,
                     "Merchant": merchant,
@@ -101,6 +177,9 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
                     "Category": category
                 })
 
+    if not transactions:
+        raise ValueError("No debit transactions found in the statement.")
+
     df = pd.DataFrame(transactions)
     
     # Normalize category names
@@ -124,7 +203,8 @@ def parse_paytm_pdf(pdf_path: str) -> dict:
         "total_expense": round(total_expense, 2),
         "categories": {k: round(v, 2) for k, v in category_totals.items()},
         "percentages": percentages,
-        "transaction_count": len(transactions)
+        "transaction_count": len(transactions),
+        "transactions": cashflow
     }
 
     return result
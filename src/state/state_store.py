@@ -0,0 +1,207 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable
+from src.constants import STATE_BACKEND, STATE_DB_PATH
+
+# Namespaces used across the backend
+SESSIONS = "sessions"
+SUMMARIES = "summaries"
+CHAT_MEMORY = "chat_memory"
+ANSWER_CACHE = "answer_cache"
+
+
+class StateStore(ABC):
+    """
+    Minimal namespaced key-value store for state that has to be shared
+    between uvicorn workers (sessions, summaries, conversation memory).
+    Values must be JSON serializable.
+    """
+
+    @abstractmethod
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def update(self, namespace: str, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Atomically replace the value with fn(current value or default) and return it.
+        fn runs while the entry is locked, so it must be quick (no network calls).
+        """
+
+    @abstractmethod
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        """
+        Return every (key, value) pair in a namespace.
+        """
+
+
+class InMemoryStateStore(StateStore):
+    """
+    Process-local store. Only correct with a single worker; state is lost on restart.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get((namespace, key), default)
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[(namespace, key)] = value
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._data.pop((namespace, key), None)
+
+    def update(self, namespace: str, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        with self._lock:
+            value = fn(self._data.get((namespace, key), default))
+            self._data[(namespace, key)] = value
+            return value
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        with self._lock:
+            return [(key, value) for (ns, key), value in self._data.items() if ns == namespace]
+
+
+class SQLiteStateStore(StateStore):
+    """
+    SQLite backed store that is safe to share between processes.
+    Uses WAL mode so readers never block the writer, and a busy timeout
+    so concurrent writers from other workers wait instead of failing.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kv (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        self._connection().execute(
+            """
+            INSERT INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """,
+            (namespace, key, json.dumps(value), time.time())
+        )
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def update(self, namespace: str, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front, so no other worker can
+        # change the entry between our read and our write
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            value = fn(self.get(namespace, key, default))
+            self.set(namespace, key, value)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM kv WHERE namespace = ?", (namespace,)
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+
+_state_store = None
+_state_store_lock = threading.Lock()
+
+def get_state_store() -> StateStore:
+    """
+    Return the process-wide state store selected by STATE_BACKEND.
+    """
+    global _state_store
+    if _state_store is None:
+        with _state_store_lock:
+            if _state_store is None:
+                if STATE_BACKEND == "memory":
+                    _state_store = InMemoryStateStore()
+                elif STATE_BACKEND == "sqlite":
+                    _state_store = SQLiteStateStore(STATE_DB_PATH)
+                else:
+                    raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND}")
+    return _state_store
+
+
+def touch_session(session_id: str) -> None:
+    """
+    Record that a session is active, keeping its creation time.
+    """
+    now = time.time()
+
+    def _touch(session):
+        session = session or {"created_at": now}
+        session["last_seen"] = now
+        return session
+
+    get_state_store().update(SESSIONS, session_id, _touch)
+
+
+def expire_sessions(ttl_seconds: float) -> list[str]:
+    """
+    Delete the stored state of sessions not seen for ttl_seconds.
+    Returns the expired session ids so callers can drop other per-session data (e.g. vectors).
+    """
+    store = get_state_store()
+    cutoff = time.time() - ttl_seconds
+    expired = [
+        session_id for session_id, session in store.items(SESSIONS)
+        if session.get("last_seen", 0) < cutoff
+    ]
+    for session_id in expired:
+        for namespace in (SUMMARIES, CHAT_MEMORY, ANSWER_CACHE, SESSIONS):
+            store.delete(namespace, session_id)
+    return expired
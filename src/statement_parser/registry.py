@@ -0,0 +1,68 @@
+from typing import BinaryIO, Callable, Union
+from pypdf import PdfReader
+from src.paytm_pdf_parser.parse_pdf import is_paytm_statement, parse_paytm_pdf
+
+StatementParser = Callable[[Union[str, BinaryIO]], dict]
+
+class UnsupportedStatementError(Exception):
+    """
+    Raised when an uploaded file is not a statement format we know how to parse.
+    """
+
+class StatementParseError(Exception):
+    """
+    Raised when a recognized statement could not be parsed.
+    """
+
+# Registered statement formats, checked in order: (name, detector, parser)
+# A detector gets the first page text and returns True if it recognizes the format.
+_PARSERS: list[tuple[str, Callable[[str], bool], StatementParser]] = []
+
+def register_parser(name: str, detector: Callable[[str], bool], parser: StatementParser) -> None:
+    """
+    Register a statement format so parse_statement can dispatch to it.
+    """
+    _PARSERS.append((name, detector, parser))
+
+def sniff_first_page(pdf_source: Union[str, BinaryIO]) -> str:
+    """
+    Extract the text of the first page only.
+    Remaining pages are never decoded, so this is cheap even for long statements.
+    """
+    if hasattr(pdf_source, "seek"):
+        pdf_source.seek(0)
+    try:
+        reader = PdfReader(pdf_source)
+        if not reader.pages:
+            raise UnsupportedStatementError("The PDF has no pages.")
+        return reader.pages[0].extract_text() or ""
+    except UnsupportedStatementError:
+        raise
+    except Exception as e:  # PdfReadError and the other pypdf failures on malformed files
+        raise UnsupportedStatementError(f"Could not read the file as a PDF: {e}")
+
+def detect_statement_parser(pdf_source: Union[str, BinaryIO]) -> StatementParser:
+    """
+    Return the parser of the registered format matching the PDF.
+    Raises UnsupportedStatementError if none matches.
+    """
+    first_page_text = sniff_first_page(pdf_source)
+    for _, detector, parser in _PARSERS:
+        if detector(first_page_text):
+            return parser
+    raise UnsupportedStatementError("Unsupported statement. Please upload a Paytm UPI statement PDF.")
+
+def parse_statement(pdf_source: Union[str, BinaryIO]) -> dict:
+    """
+    Detect the statement format from the first page and run the matching parser.
+    Raises UnsupportedStatementError for unknown files and StatementParseError
+    when the matching parser fails.
+    """
+    parser = detect_statement_parser(pdf_source)
+    try:
+        return parser(pdf_source)
+    except Exception as e:
+        raise StatementParseError(f"Could not parse the statement: {e}") from e
+
+# Built-in formats
+register_parser("paytm_upi", is_paytm_statement, parse_paytm_pdf)
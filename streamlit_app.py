@@ -4,9 +4,20 @@ import pandas as pd
 import altair as alt
 import matplotlib.pyplot as plt
 import requests
+import uuid
+from src.analytics.cashflow import FREQUENCIES, transactions_to_frame, cashflow_series
 
 st.set_page_config(page_title="💰 Personal Expense Tracker", layout="wide")
 
+# Backend state (summary, chat memory) is keyed on this id, so any backend worker can serve the user
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = str(uuid.uuid4())
+
+@st.cache_data(show_spinner=False)
+def build_cashflow(transactions, freq, window):
+    # Cached so switching granularity back and forth doesn't recompute the series
+    return cashflow_series(transactions_to_frame(transactions), freq, window).reset_index()
+
 # ---------- Main Title ----------
 st.markdown(
     """
@@ -127,6 +138,10 @@ with left_col:
                     pct = data['percentages'].get(cat, 0)
                     expense_str += f"{cat}: ₹{amt} ({pct}%)\n"
                 st.session_state["expense_summary_payload"] = expense_str
+            elif response.status_code == 415:
+                pdf_error_placeholder.error("⚠️ Please upload the **actual Paytm UPI Monthly Statement PDF**.")
+            elif response.status_code == 422:
+                pdf_error_placeholder.error(f"⚠️ Could not read transactions from this statement. {response.json().get('error', '')}")
             else:
                 pdf_error_placeholder.error(f"⚠️ Backend error. Status: {response.status_code}")
         except Exception:
@@ -269,6 +284,38 @@ with right_col:
 
         st.subheader("Category-wise Share (%)")
         st.pyplot(fig)
+
+        # ---------- Cashflow chart (PDF statements only) ----------
+        if data.get("transactions"):
+            st.subheader("Cashflow Over Time")
+            col1, col2 = st.columns(2)
+            with col1:
+                granularity = st.selectbox("Group by", list(FREQUENCIES.keys()))
+            with col2:
+                window = st.slider("Moving average (periods)", min_value=1, max_value=30, value=7)
+
+            cashflow_df = build_cashflow(data["transactions"], FREQUENCIES[granularity], window)
+
+            net_bars = alt.Chart(cashflow_df).mark_bar(opacity=0.6).encode(
+                x=alt.X('timestamp:T', title=granularity),
+                y=alt.Y('net:Q', title='Net Cashflow (₹)'),
+                color=alt.condition(alt.datum.net >= 0, alt.value('#2ca02c'), alt.value('#d62728')),
+                tooltip=['timestamp:T', 'credit:Q', 'debit:Q', 'net:Q',
+                         alt.Tooltip('balance:Q', title='cumulative net')]
+            )
+            balance_line = alt.Chart(cashflow_df).mark_line(color='#1f77b4').encode(
+                x='timestamp:T',
+                y=alt.Y('balance:Q', title='Cumulative Net Cashflow (₹)')
+            )
+            moving_avg_line = alt.Chart(cashflow_df).mark_line(color='orange', strokeDash=[4, 4]).encode(
+                x='timestamp:T',
+                y='net_moving_avg:Q'
+            )
+
+            st.altair_chart(
+                alt.layer(net_bars + moving_avg_line, balance_line).resolve_scale(y='independent').properties(height=350),
+                use_container_width=True
+            )
             
 
 st.markdown(
@@ -299,7 +346,10 @@ if "expense_summary_payload" in st.session_state:
         status_placeholder = st.empty()
         status_placeholder.info("📝 Generating summary... Please wait.")
 
-        payload = {"expenses": st.session_state["expense_summary_payload"]}
+        payload = {
+            "expenses": st.session_state["expense_summary_payload"],
+            "session_id": st.session_state["session_id"]
+        }
 
         try:
             response = requests.post("http://127.0.0.1:8000/summarize", json=payload)
@@ -343,7 +393,8 @@ if "expense_summary_payload" in st.session_state:
                 "http://127.0.0.1:8000/chat",
                 json={
                     "query": query,
-                    "expenses": st.session_state["expense_summary_payload"]
+                    "expenses": st.session_state["expense_summary_payload"],
+                    "session_id": st.session_state["session_id"]
                 }
             )
             bot_reply = response.json().get("answer", "⚠️ Something went wrong.")